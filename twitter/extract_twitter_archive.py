@@ -20,39 +20,132 @@ Author: Colin Greenstreet / Claude (Anthropic)
 Date: 17 February 2026
 """
 
+import heapq
 import json
+import multiprocessing
+import re
 import sys
 import zipfile
-import tempfile
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from sys import intern
 from collections import Counter
-from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json module
+    orjson = None
+
+_UTC = timezone.utc
+_MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+_MONTH_NUMBERS = {name: f"{num:02d}" for name, num in _MONTHS.items()}
+# Scheme, optional userinfo and 'www.', then the host up to any port/path/query
+_URL_HOST = re.compile(r"[^:/]*://(?:[^@/?#]*@)?(?:www\.)?([^/?#:]*)")
+_EXCLUDED_DOMAINS = ("twitter.com", "t.co")
+_EXCLUDED_SUFFIXES = (".twitter.com", ".t.co")
+TOP_TWEETS = 20
+# Below this many tweets, process start-up outweighs any parallel speed-up
+PARALLEL_MIN_TWEETS = 50_000
+# Shared read-only default for tweets without an entities block
+_NO_ENTITIES = {}
+# Field order of the list-backed monthly/yearly volume tallies
+_MONTH_FIELDS = ("total", "original", "retweet")
+_YEAR_FIELDS = (
+    "total", "original", "retweet", "with_media", "favorites", "retweet_count",
+)
+
+
+def load_twitter_js(f):
+    """Load a Twitter archive .js file, stripping the window.YTD assignment prefix.
+
+    Takes a binary file-like object, e.g. from open(path, "rb") or ZipFile.open().
+    """
+    # Read raw bytes: both orjson and json accept UTF-8 bytes directly
+    content = f.read()
+    json_start = content.index(b"[")
+    if orjson is not None:
+        return orjson.loads(content[json_start:])
+    return json.loads(content[json_start:])
 
 
-def load_twitter_js(filepath):
-    """Load a Twitter archive .js file, stripping the window.YTD assignment prefix."""
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-    json_start = content.index("[")
-    return json.loads(content[json_start:])
+def _parse_twitter_dt(s):
+    """Parse a created_at timestamp such as 'Wed Jul 11 10:20:30 +0000 2012'.
 
+    Archive timestamps are fixed-width and always UTC, so slicing the fields
+    out directly is much cheaper than datetime.strptime.
+    """
+    return datetime(
+        int(s[26:30]),
+        _MONTHS[s[4:7]],
+        int(s[8:10]),
+        int(s[11:13]),
+        int(s[14:16]),
+        int(s[17:19]),
+        tzinfo=_UTC,
+    )
 
-def extract_archive(zip_path, extract_dir):
-    """Extract a Twitter archive zip to a temporary directory."""
-    with zipfile.ZipFile(zip_path, "r") as zf:
-        zf.extractall(extract_dir)
-    # Find the data/ directory (may be nested)
-    for root, dirs, files in os.walk(extract_dir):
-        if "tweets.js" in files:
-            return root
-    raise FileNotFoundError("Could not find tweets.js in archive")
+
+def _url_domain(url):
+    """Return the host of an absolute URL, without any 'www.' prefix or port."""
+    match = _URL_HOST.match(url)
+    return match[1] if match else ""
+
+
+# Parsed tweets shared with forked workers by _process_parallel
+_shared_tweets = None
 
 
-def process_tweets(data_dir):
-    """Process tweets.js and produce aggregated content data."""
-    tweets = load_twitter_js(os.path.join(data_dir, "tweets.js"))
+def _keep_top(heap, entry):
+    """Push entry onto a min-heap holding at most TOP_TWEETS of the largest entries."""
+    if len(heap) < TOP_TWEETS:
+        heapq.heappush(heap, entry)
+    else:
+        heapq.heappushpop(heap, entry)
+
+
+def _top_tweets(tweets, entries):
+    """Convert _keep_top heap entries into output rows, largest first.
+
+    Entries only carry the tweet position, so the date and text are looked
+    up in tweets for the handful of winners.
+    """
+    rows = []
+    for _, neg_position, fav, rts in sorted(entries, reverse=True):
+        tw = tweets[-neg_position]["tweet"]
+        created_at = tw["created_at"]
+        date = (
+            created_at[26:30]
+            + "-"
+            + _MONTH_NUMBERS[created_at[4:7]]
+            + "-"
+            + created_at[8:10]
+        )
+        rows.append(
+            {
+                "date": date,
+                "text": tw["full_text"][:200],
+                "favorites": fav,
+                "retweets": rts,
+            }
+        )
+    return rows
 
+
+def find_tweets_js(zf):
+    """Return the name of the tweets.js entry in an open archive zip."""
+    # The data/ directory may be nested, so match on the basename
+    for name in zf.namelist():
+        if name.rsplit("/", 1)[-1] == "tweets.js":
+            return name
+    raise FileNotFoundError("Could not find tweets.js in archive")
+
+
+def _process_chunk(tweets, start, stop):
+    """Aggregate tweets[start:stop] into a partial result for _merge_chunks."""
     # Accumulators
     all_hashtags = Counter()
     all_mentions = Counter()
@@ -63,116 +156,234 @@ def process_tweets(data_dir):
     hashtags_by_year = {}
     mentions_by_year = {}
     domains_by_year = {}
-    records = []
-
-    for t in tweets:
-        tw = t["tweet"]
-        dt = datetime.strptime(tw["created_at"], "%a %b %d %H:%M:%S %z %Y")
-        year = str(dt.year)
-        year_month = dt.strftime("%Y-%m")
+    with_urls = 0
+    # Min-heaps of (count, -position, favorites, retweets); the negated
+    # position makes ties favour the earlier tweet
+    top_fav_heap = []
+    top_rt_heap = []
+    min_dt = None
+    max_dt = None
+    # Tweets arrive clustered by date, so keep the per-year and per-month
+    # accumulators from the previous tweet rather than re-fetching them
+    last_year = None
+    last_year_month = None
+
+    for position in range(start, stop):
+        tw = tweets[position]["tweet"]
+        created_at = tw["created_at"]
+        dt = _parse_twitter_dt(created_at)
+        if min_dt is None or dt < min_dt:
+            min_dt = dt
+        if max_dt is None or dt > max_dt:
+            max_dt = dt
+        # Build date keys straight from the fixed-width source string. Keys
+        # (years, tags, accounts, domains) repeat heavily, so they are
+        # interned to share a single string object per distinct value.
+        year = intern(created_at[26:30])
+        year_month = year + "-" + _MONTH_NUMBERS[created_at[4:7]]
+        if year != last_year:
+            last_year = year
+            year_volume = yearly_volume.setdefault(year, [0] * len(_YEAR_FIELDS))
+            year_hashtags = hashtags_by_year.get(year)
+            year_mentions = mentions_by_year.get(year)
+            year_domains = domains_by_year.get(year)
+        if year_month != last_year_month:
+            last_year_month = year_month
+            month_volume = monthly_volume.setdefault(
+                year_month, [0] * len(_MONTH_FIELDS)
+            )
+
+        full_text = tw["full_text"]
+        # Read all entity lists up front; many tweets (notably retweets)
+        # have none, and empty lists skip their block entirely below
+        entities = tw.get("entities") or _NO_ENTITIES
+        media_entities = entities.get("media")
+        hashtag_entities = entities.get("hashtags")
+        mention_entities = entities.get("user_mentions")
+        url_entities = entities.get("urls")
 
         # Classification
-        is_rt = tw["full_text"].startswith("RT @")
-        has_media = (
-            "extended_entities" in tw
-            or len(tw.get("entities", {}).get("media", [])) > 0
-        )
+        is_rt = full_text.startswith("RT @")
+        has_media = "extended_entities" in tw or bool(media_entities)
 
         # Hashtags
-        hashtags = [
-            h["text"].lower() for h in tw.get("entities", {}).get("hashtags", [])
-        ]
-        for h in hashtags:
-            all_hashtags[h] += 1
-            hashtags_by_year.setdefault(year, Counter())[h] += 1
+        if hashtag_entities:
+            hashtags = [intern(h["text"].lower()) for h in hashtag_entities]
+            all_hashtags.update(hashtags)
+            if year_hashtags is None:
+                year_hashtags = hashtags_by_year[year] = Counter()
+            year_hashtags.update(hashtags)
 
         # Mentions
-        mentions = [
-            m["screen_name"]
-            for m in tw.get("entities", {}).get("user_mentions", [])
-        ]
-        for m in mentions:
-            all_mentions[m] += 1
-            mentions_by_year.setdefault(year, Counter())[m] += 1
+        if mention_entities:
+            mentions = [intern(m["screen_name"]) for m in mention_entities]
+            all_mentions.update(mentions)
+            if year_mentions is None:
+                year_mentions = mentions_by_year[year] = Counter()
+            year_mentions.update(mentions)
 
         # URLs and domains
-        urls = tw.get("entities", {}).get("urls", [])
-        url_count = 0
-        for u in urls:
-            expanded = u.get("expanded_url", u.get("url", ""))
-            if expanded:
-                try:
-                    domain = urlparse(expanded).netloc.replace("www.", "")
-                    if domain and "twitter.com" not in domain and "t.co" not in domain:
-                        all_domains[domain] += 1
-                        domains_by_year.setdefault(year, Counter())[domain] += 1
-                        url_count += 1
-                except Exception:
-                    pass
+        if url_entities:
+            domains = []
+            for u in url_entities:
+                expanded = u.get("expanded_url", u.get("url", ""))
+                if expanded:
+                    domain = intern(_url_domain(expanded))
+                    if (
+                        domain
+                        and domain not in _EXCLUDED_DOMAINS
+                        and not domain.endswith(_EXCLUDED_SUFFIXES)
+                    ):
+                        domains.append(domain)
+            if domains:
+                with_urls += 1
+                all_domains.update(domains)
+                if year_domains is None:
+                    year_domains = domains_by_year[year] = Counter()
+                year_domains.update(domains)
 
         # Language
         lang_counts[tw.get("lang", "und")] += 1
 
-        # Monthly volume
-        monthly_volume.setdefault(
-            year_month, {"total": 0, "original": 0, "retweet": 0}
-        )
-        monthly_volume[year_month]["total"] += 1
-        if is_rt:
-            monthly_volume[year_month]["retweet"] += 1
-        else:
-            monthly_volume[year_month]["original"] += 1
+        # Monthly volume (indexed as _MONTH_FIELDS)
+        month_volume[0] += 1
+        month_volume[2 if is_rt else 1] += 1
 
-        # Yearly volume
-        yearly_volume.setdefault(
-            year,
-            {
-                "total": 0,
-                "original": 0,
-                "retweet": 0,
-                "with_media": 0,
-                "favorites": 0,
-                "retweet_count": 0,
-            },
-        )
-        yearly_volume[year]["total"] += 1
-        if is_rt:
-            yearly_volume[year]["retweet"] += 1
-        else:
-            yearly_volume[year]["original"] += 1
+        # Yearly volume (indexed as _YEAR_FIELDS)
+        year_volume[0] += 1
+        year_volume[2 if is_rt else 1] += 1
         if has_media:
-            yearly_volume[year]["with_media"] += 1
-        yearly_volume[year]["favorites"] += int(tw.get("favorite_count", 0))
-        yearly_volume[year]["retweet_count"] += int(tw.get("retweet_count", 0))
+            year_volume[3] += 1
+        # Archive exports store the counts as strings, e.g. "favorite_count": "12"
+        fav = int(tw.get("favorite_count", 0))
+        rts = int(tw.get("retweet_count", 0))
+        year_volume[4] += fav
+        year_volume[5] += rts
+
+        # Top tweets
+        if len(top_fav_heap) < TOP_TWEETS or fav > top_fav_heap[0][0]:
+            _keep_top(top_fav_heap, (fav, -position, fav, rts))
+        if len(top_rt_heap) < TOP_TWEETS or rts > top_rt_heap[0][0]:
+            _keep_top(top_rt_heap, (rts, -position, fav, rts))
+
+    return {
+        "hashtags": all_hashtags,
+        "mentions": all_mentions,
+        "domains": all_domains,
+        "languages": lang_counts,
+        "monthly_volume": monthly_volume,
+        "yearly_volume": yearly_volume,
+        "hashtags_by_year": hashtags_by_year,
+        "mentions_by_year": mentions_by_year,
+        "domains_by_year": domains_by_year,
+        "with_urls": with_urls,
+        "top_fav": top_fav_heap,
+        "top_rt": top_rt_heap,
+        "min_dt": min_dt,
+        "max_dt": max_dt,
+    }
 
-        records.append(
-            {
-                "date": dt.strftime("%Y-%m-%d"),
-                "text": tw["full_text"][:200],
-                "favorites": int(tw.get("favorite_count", 0)),
-                "retweets": int(tw.get("retweet_count", 0)),
-                "is_retweet": is_rt,
-                "has_media": has_media,
-                "url_count": url_count,
-            }
-        )
 
-    # Compute totals
-    total = len(records)
-    originals = sum(1 for r in records if not r["is_retweet"])
-    with_media = sum(1 for r in records if r["has_media"])
-    with_urls = sum(1 for r in records if r["url_count"] > 0)
+def _process_shared_chunk(start, stop):
+    """Worker entry point: aggregate a slice of the fork-inherited tweets."""
+    return _process_chunk(_shared_tweets, start, stop)
+
+
+def _process_parallel(tweets, workers):
+    """Split tweets into one contiguous chunk per worker and aggregate them."""
+    global _shared_tweets
+    size = -(-len(tweets) // workers)
+    starts = range(0, len(tweets), size)
+    stops = [min(start + size, len(tweets)) for start in starts]
+    # Forked workers inherit the parsed tweets; pickling them across to the
+    # workers would cost about as much as processing them
+    _shared_tweets = tweets
+    try:
+        with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            return list(pool.map(_process_shared_chunk, starts, stops))
+    finally:
+        _shared_tweets = None
+
+
+def _merge_counters(target, source):
+    """Merge a dict of Counters (e.g. hashtags_by_year) into another."""
+    for key, counter in source.items():
+        if key in target:
+            target[key].update(counter)
+        else:
+            target[key] = counter
 
-    # Top tweets
-    top_by_fav = sorted(records, key=lambda x: x["favorites"], reverse=True)[:20]
-    top_by_rt = sorted(records, key=lambda x: x["retweets"], reverse=True)[:20]
 
-    # Date range
-    dates = [
-        datetime.strptime(tw["tweet"]["created_at"], "%a %b %d %H:%M:%S %z %Y")
-        for tw in tweets
-    ]
-    dates.sort()
+def _merge_tallies(target, source):
+    """Merge a dict of list-backed volume tallies into another."""
+    for key, tally in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = tally
+        else:
+            for i, n in enumerate(tally):
+                current[i] += n
+
+
+def _merge_chunks(parts):
+    """Combine _process_chunk results, given in tweet order, into one.
+
+    Merging in order keeps first-seen key order, so ties in most_common and
+    the ordering of the volume breakdowns match a single-process run.
+    """
+    merged = parts[0]
+    for part in parts[1:]:
+        for key in ("hashtags", "mentions", "domains", "languages"):
+            merged[key].update(part[key])
+        for key in ("hashtags_by_year", "mentions_by_year", "domains_by_year"):
+            _merge_counters(merged[key], part[key])
+        for key in ("monthly_volume", "yearly_volume"):
+            _merge_tallies(merged[key], part[key])
+        merged["with_urls"] += part["with_urls"]
+        for key in ("top_fav", "top_rt"):
+            merged[key] = heapq.nlargest(TOP_TWEETS, merged[key] + part[key])
+        merged["min_dt"] = min(merged["min_dt"], part["min_dt"])
+        merged["max_dt"] = max(merged["max_dt"], part["max_dt"])
+    return merged
+
+
+def process_tweets(tweets_file, workers=None):
+    """Process tweets.js (a binary file-like object) and produce aggregated content data.
+
+    Large archives are aggregated in chunks across `workers` processes
+    (default: one per CPU) where fork is available; otherwise in-process.
+    """
+    tweets = load_twitter_js(tweets_file)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if (
+        workers > 1
+        and len(tweets) >= PARALLEL_MIN_TWEETS
+        and "fork" in multiprocessing.get_all_start_methods()
+    ):
+        parts = _process_parallel(tweets, workers)
+    else:
+        parts = [_process_chunk(tweets, 0, len(tweets))]
+    merged = _merge_chunks(parts)
+    all_hashtags = merged["hashtags"]
+    all_mentions = merged["mentions"]
+    all_domains = merged["domains"]
+    lang_counts = merged["languages"]
+    monthly_volume = merged["monthly_volume"]
+    yearly_volume = merged["yearly_volume"]
+    hashtags_by_year = merged["hashtags_by_year"]
+    mentions_by_year = merged["mentions_by_year"]
+    domains_by_year = merged["domains_by_year"]
+    with_urls = merged["with_urls"]
+    min_dt = merged["min_dt"]
+    max_dt = merged["max_dt"]
+
+    # Compute totals from the per-year tallies
+    total = sum(v[0] for v in yearly_volume.values())
+    originals = sum(v[1] for v in yearly_volume.values())
+    with_media = sum(v[3] for v in yearly_volume.values())
 
     # Build output
     output = {
@@ -184,8 +395,8 @@ def process_tweets(data_dir):
         "unique_hashtags": len(all_hashtags),
         "unique_mentions": len(all_mentions),
         "date_range": {
-            "start": dates[0].strftime("%Y-%m-%d"),
-            "end": dates[-1].strftime("%Y-%m-%d"),
+            "start": min_dt.strftime("%Y-%m-%d"),
+            "end": max_dt.strftime("%Y-%m-%d"),
         },
         "top_hashtags": [
             {"tag": h, "count": c} for h, c in all_hashtags.most_common(50)
@@ -199,8 +410,12 @@ def process_tweets(data_dir):
         "languages": [
             {"lang": l, "count": c} for l, c in lang_counts.most_common(20)
         ],
-        "monthly_volume": monthly_volume,
-        "yearly_volume": yearly_volume,
+        "monthly_volume": {
+            ym: dict(zip(_MONTH_FIELDS, v)) for ym, v in monthly_volume.items()
+        },
+        "yearly_volume": {
+            y: dict(zip(_YEAR_FIELDS, v)) for y, v in yearly_volume.items()
+        },
         "hashtags_by_year": {
             y: [{"tag": h, "count": c} for h, c in counter.most_common(20)]
             for y, counter in hashtags_by_year.items()
@@ -213,24 +428,8 @@ def process_tweets(data_dir):
             y: [{"domain": d, "count": c} for d, c in counter.most_common(20)]
             for y, counter in domains_by_year.items()
         },
-        "top_tweets_by_favorites": [
-            {
-                "date": r["date"],
-                "text": r["text"],
-                "favorites": r["favorites"],
-                "retweets": r["retweets"],
-            }
-            for r in top_by_fav
-        ],
-        "top_tweets_by_retweets": [
-            {
-                "date": r["date"],
-                "text": r["text"],
-                "favorites": r["favorites"],
-                "retweets": r["retweets"],
-            }
-            for r in top_by_rt
-        ],
+        "top_tweets_by_favorites": _top_tweets(tweets, merged["top_fav"]),
+        "top_tweets_by_retweets": _top_tweets(tweets, merged["top_rt"]),
     }
 
     return output
@@ -245,11 +444,12 @@ def main():
     output_path = sys.argv[2] if len(sys.argv) > 2 else "dashboard_data.json"
 
     if os.path.isfile(source) and source.endswith(".zip"):
-        with tempfile.TemporaryDirectory() as tmp:
-            print(f"Extracting {source}...")
-            data_dir = extract_archive(source, tmp)
-            print(f"Processing tweets from {data_dir}...")
-            result = process_tweets(data_dir)
+        # Stream tweets.js straight out of the zip; nothing is written to disk
+        with zipfile.ZipFile(source, "r") as zf:
+            name = find_tweets_js(zf)
+            print(f"Processing tweets from {source}:{name}...")
+            with zf.open(name) as f:
+                result = process_tweets(f)
     elif os.path.isdir(source):
         # Assume data/ subdirectory or direct path to tweets.js directory
         if os.path.exists(os.path.join(source, "tweets.js")):
@@ -260,13 +460,20 @@ def main():
             print("Error: Could not find tweets.js in the specified directory")
             sys.exit(1)
         print(f"Processing tweets from {data_dir}...")
-        result = process_tweets(data_dir)
+        with open(os.path.join(data_dir, "tweets.js"), "rb") as f:
+            result = process_tweets(f)
     else:
         print(f"Error: {source} is not a valid zip file or directory")
         sys.exit(1)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
+    # Serialise in one call and write the bytes out in one go; json.dump
+    # would encode through many small incremental writes instead
+    if orjson is not None:
+        data = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(result, indent=2).encode("utf-8")
+    with open(output_path, "wb") as f:
+        f.write(data)
 
     print(f"Dashboard data written to {output_path}")
     print(f"  Total tweets: {result['total_tweets']:,}")